@@ -5,9 +5,20 @@ This module contains vectorized implementations of navigation metrics,
 significantly faster than the original row-by-row iteration approach.
 """
 
+import csv
+import os
+
 import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    # Optional, enables Parquet intermediates and the pyarrow CSV engine
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
 
 
 # Target names in canonical order
@@ -22,25 +33,57 @@ TARGET_ORDER = [
     'High School'
 ]
 
+# Categorical dtype for Target_Name; codes follow the canonical target order
+TARGET_DTYPE = pd.CategoricalDtype(TARGET_ORDER)
+
 # Starting position coordinates
 START_X = 0
 START_Z = -4.1
 
+# Columns read from raw Saved_data_*.csv files and their parse types.
+# Positions and time stay float64 (exact start-position matching); the
+# bracketed Euler angle strings are parsed in process_raw_data(). Target
+# names are read as a categorical so each distinct name is stored once.
+RAW_COLUMN_DTYPES = {
+    'Lapsed Time': 'float64',
+    'Target Name': 'category',
+    'X': 'float64',
+    'Z': 'float64',
+    'X Euler Angle': str,
+    'Y Euler Angle': 'float32',
+    'Z Euler Angle': str,
+}
+
+# Per-target metric columns produced by calculate_all_metrics()
+METRIC_COLUMNS = [
+    'Total_Time', 'Orientation_Time', 'Navigation_Time',
+    'Distance', 'Speed', 'Mean_Dwell',
+    'Teleportations', 'Mean_Teleport_Distance'
+]
+
 
-def process_raw_data(filepath: str) -> pd.DataFrame:
+def process_raw_data(filepath: str, dtypes: Optional[Dict[str, str]] = None) -> pd.DataFrame:
     """
     Load and preprocess raw NavCity CSV data.
 
     Args:
         filepath: Path to the raw CSV file (Saved_data_*.csv)
+        dtypes: Optional parse types overriding RAW_COLUMN_DTYPES, keyed by
+            raw column name (e.g. {'X': 'float32', 'Z': 'float32'})
 
     Returns:
         Cleaned DataFrame with processed columns
     """
-    df = pd.read_csv(filepath)
-
-    # Skip header rows (first 3 rows are metadata)
-    df = df.iloc[3:].reset_index(drop=True)
+    # Skip header rows (first 3 rows after the header are metadata) and only
+    # parse the columns used below, with their types declared up front
+    column_dtypes = RAW_COLUMN_DTYPES if dtypes is None else {**RAW_COLUMN_DTYPES, **dtypes}
+    df = pd.read_csv(
+        filepath,
+        skiprows=[1, 2, 3],
+        usecols=list(column_dtypes),
+        dtype=column_dtypes,
+        engine='c'
+    )
 
     # Rename columns for consistency
     df = df.rename(columns={
@@ -53,8 +96,9 @@ def process_raw_data(filepath: str) -> pd.DataFrame:
 
     # Process Euler angles (remove parenthesis characters)
     # X Euler Angle has '(' prefix, Z Euler Angle has ')' suffix
-    df['X Euler Angle'] = df['X Euler Angle'].str[1:].astype(float)
-    df['Z Euler Angle'] = df['Z Euler Angle'].str[:-1].astype(float)
+    # Angles are only used for revaluation, so float32 precision is sufficient
+    df['X Euler Angle'] = pd.to_numeric(df['X Euler Angle'].str.slice(start=1), downcast='float')
+    df['Z Euler Angle'] = pd.to_numeric(df['Z Euler Angle'].str.slice(stop=-1), downcast='float')
 
     # Store original angles
     df['X_A'] = df['X Euler Angle']
@@ -64,13 +108,19 @@ def process_raw_data(filepath: str) -> pd.DataFrame:
     # Revalue angles (convert >180 to negative)
     for col in ['X_A', 'Y_A', 'Z_A']:
         rev_col = f'{col}_Rev'
-        df[rev_col] = df[col].apply(lambda x: -(360 - x) if x > 180 else x)
-        df[f'{rev_col}_Diff'] = df[rev_col].diff().abs().fillna(0)
-
-    # Remove "Mission complete" rows
+        vals = df[col].to_numpy()
+        rev = np.where(vals > 180, vals - 360, vals)
+        df[rev_col] = rev
+        # Missing angles give a zero difference for both neighbouring rows
+        rev_diff = np.abs(np.diff(rev, prepend=rev[:1]))
+        df[f'{rev_col}_Diff'] = np.where(np.isnan(rev_diff), 0, rev_diff)
+
+    # Remove "Mission complete" rows and encode targets as categorical codes
+    # in canonical order
     df = df[df['Target_Name'] != 'Mission complete']
+    df = df.assign(Target_Name=df['Target_Name'].astype(TARGET_DTYPE))
 
-    # Select and return relevant columns
+    # Select and return relevant columns (the selection is already a new frame)
     cols = [
         'Target_Name', 'X', 'Z',
         'X_A', 'X_A_Rev', 'X_A_Rev_Diff',
@@ -78,7 +128,112 @@ def process_raw_data(filepath: str) -> pd.DataFrame:
         'Z_A', 'Z_A_Rev', 'Z_A_Rev_Diff',
         'Time', 'Time_Diff'
     ]
-    return df[cols].copy()
+    return df.loc[:, cols]
+
+
+def _group_starts(*keys: np.ndarray) -> np.ndarray:
+    """
+    Start index of each run of equal rows across one or more sorted key arrays.
+
+    Missing float keys compare equal to each other, as in drop_duplicates().
+    """
+    changed = np.zeros(keys[0].size - 1, dtype=bool)
+    for key in keys:
+        key_changed = key[1:] != key[:-1]
+        if key.dtype.kind == 'f':
+            key_changed &= ~(np.isnan(key[1:]) & np.isnan(key[:-1]))
+        changed |= key_changed
+    return np.flatnonzero(np.r_[True, changed])
+
+
+def _target_metrics_kernel(
+    codes: np.ndarray,
+    x: np.ndarray,
+    z: np.ndarray,
+    t: np.ndarray,
+    dt: np.ndarray,
+    start_dt: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute all metrics per target over flat arrays.
+
+    Rows must be sorted by target code, keeping acquisition order within each
+    target. Every metric is a linear-time reduction over group boundaries.
+
+    Args:
+        codes: Integer target code per row
+        x, z: Position per row
+        t: Lapsed time per row
+        dt: Time difference per row
+        start_dt: Time difference per row at the starting position, 0 elsewhere
+
+    Returns:
+        Tuple of (target codes present, array of shape (n_targets, len(METRIC_COLUMNS)))
+    """
+    if codes.size == 0:
+        return codes, np.zeros((0, len(METRIC_COLUMNS)))
+
+    starts = _group_starts(codes)
+    group_codes = codes[starts]
+
+    # Results are written straight into one preallocated array; each name
+    # below is a view of one column, in METRIC_COLUMNS order
+    metrics = np.empty((starts.size, len(METRIC_COLUMNS)))
+    (total_time, orientation_time, navigation_time,
+     distance, speed, mean_dwell,
+     teleportations, mean_teleport_distance) = metrics.T
+
+    # Total Time / Orientation Time: time spent overall and at the starting position
+    np.add.reduceat(dt, starts, out=total_time)
+    np.add.reduceat(start_dt, starts, out=orientation_time)
+    np.subtract(total_time, orientation_time, out=navigation_time)
+
+    # Unique (target, X, Z) positions: a stable lexsort keeps rows at the same
+    # position in acquisition order, so each run yields its first and last visit.
+    # Positions with a missing coordinate are sorted after the complete ones.
+    missing = np.isnan(x) | np.isnan(z)
+    order = np.lexsort((z, x, missing, codes))
+    pos_starts = _group_starts(codes[order], x[order], z[order])
+    first_idx = order[pos_starts]
+    last_idx = order[np.r_[pos_starts[1:], order.size] - 1]
+    pos_group_starts = _group_starts(codes[first_idx])
+    complete = ~missing[first_idx]
+
+    # Teleportations: count of unique positions
+    teleportations[:] = np.diff(np.r_[pos_group_starts, first_idx.size])
+    has_moves = teleportations > 1
+
+    # Mean Dwell: average time spent at each unique position
+    # Remove first position (starting point) from calculation; positions are
+    # ranked by (X, Z) here, matching the original per-position groupby, which
+    # also leaves out positions with a missing coordinate
+    n_complete = np.add.reduceat(complete, pos_group_starts, dtype=np.int64)
+    dwell = np.where(complete, t[last_idx] - t[first_idx], 0.0)
+    dwell_sum = np.add.reduceat(dwell, pos_group_starts) - dwell[pos_group_starts]
+
+    # Distance: steps between consecutive unique positions in first-visit order.
+    # Targets occupy the same contiguous ranges in this order, and the step
+    # leaving each target is zeroed so it never crosses into the next one.
+    visited = np.sort(first_idx)
+    vx, vz, vc = x[visited], z[visited], codes[visited]
+    # Steps to or from a position with a missing coordinate are skipped.
+    steps = np.r_[np.hypot(np.diff(vx), np.diff(vz)), 0.0]
+    steps[np.isnan(steps)] = 0.0
+    steps[:-1][vc[1:] != vc[:-1]] = 0.0
+    np.add.reduceat(steps, pos_group_starts, out=distance)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed[:] = np.where(navigation_time > 0, distance / navigation_time, 0.0)
+        mean_dwell[:] = np.where(n_complete > 1, dwell_sum / (n_complete - 1), 0.0)
+        mean_teleport_distance[:] = np.where(has_moves, distance / (teleportations - 1), 0.0)
+
+    # Mean Teleport Distance is undefined once a step involves a missing
+    # coordinate. As in the original, every row with a missing coordinate
+    # counts as its own position here, so a lone such row still gives 0.
+    n_missing = np.add.reduceat(missing, starts, dtype=np.int64)
+    mean_teleport_distance[(n_missing > 0) & (n_complete + n_missing > 1)] = np.nan
+
+    return group_codes, metrics
 
 
 def calculate_all_metrics(data: pd.DataFrame) -> pd.DataFrame:
@@ -94,75 +249,50 @@ def calculate_all_metrics(data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with one row per target containing all metrics
     """
-    results = []
-
-    for target_name, group in data.groupby('Target_Name'):
-        metrics = {'Target_Name': target_name}
-
-        # Total Time: sum of all time differences
-        metrics['Total_Time'] = group['Time_Diff'].sum()
-
-        # Orientation Time: time spent at starting position
-        at_start = (group['X'] == START_X) & (group['Z'] == START_Z)
-        metrics['Orientation_Time'] = group.loc[at_start, 'Time_Diff'].sum()
-
-        # Navigation Time: total time minus orientation time
-        metrics['Navigation_Time'] = metrics['Total_Time'] - metrics['Orientation_Time']
-
-        # Distance: total path length (only counting unique position changes)
-        unique_pos = group.drop_duplicates(subset=['X', 'Z'], keep='first')
-        dx = unique_pos['X'].diff()
-        dz = unique_pos['Z'].diff()
-        metrics['Distance'] = np.sqrt(dx**2 + dz**2).sum()
-
-        # Speed: distance / navigation time (handle division by zero)
-        if metrics['Navigation_Time'] > 0:
-            metrics['Speed'] = metrics['Distance'] / metrics['Navigation_Time']
-        else:
-            metrics['Speed'] = 0
-
-        # Mean Dwell: average time spent at each unique position
-        dwell_times = []
-        for (x, z), pos_group in group.groupby(['X', 'Z']):
-            dwell = pos_group['Time'].iloc[-1] - pos_group['Time'].iloc[0]
-            dwell_times.append(dwell)
-        # Remove first position (starting point) from calculation
-        if len(dwell_times) > 1:
-            metrics['Mean_Dwell'] = np.mean(dwell_times[1:])
-        else:
-            metrics['Mean_Dwell'] = 0
-
-        # Teleportations: count of unique positions
-        metrics['Teleportations'] = group[['X', 'Z']].drop_duplicates().shape[0]
-
-        # Mean Teleport Distance: average distance between consecutive unique positions
-        unique_positions = []
-        seen = set()
-        for _, row in group.iterrows():
-            pos = (row['X'], row['Z'])
-            if pos not in seen:
-                unique_positions.append(pos)
-                seen.add(pos)
-
-        if len(unique_positions) > 1:
-            teleport_distances = []
-            for i in range(1, len(unique_positions)):
-                x1, z1 = unique_positions[i-1]
-                x2, z2 = unique_positions[i]
-                dist = np.sqrt((x2 - x1)**2 + (z2 - z1)**2)
-                teleport_distances.append(dist)
-            metrics['Mean_Teleport_Distance'] = np.mean(teleport_distances)
-        else:
-            metrics['Mean_Teleport_Distance'] = 0
-
-        results.append(metrics)
-
-    # Create DataFrame and reorder by canonical target order
-    df_results = pd.DataFrame(results).set_index('Target_Name')
-
-    # Reindex to canonical order (only include targets that exist in data)
-    available_targets = [t for t in TARGET_ORDER if t in df_results.index]
-    df_results = df_results.reindex(available_targets)
+    targets = data['Target_Name']
+    if targets.dtype != TARGET_DTYPE:
+        targets = targets.astype(TARGET_DTYPE)
+    codes = targets.cat.codes.to_numpy()
+
+    # Group rows by target (stable, so acquisition order is kept within each
+    # target); rows with unknown or missing target names (code -1) are dropped.
+    # Targets are normally recorded one after another in canonical order, so
+    # the rows are usually grouped already and can be used as views.
+    if (codes[1:] >= codes[:-1]).all():
+        order = slice(np.searchsorted(codes, 0), None)
+    else:
+        order = np.argsort(codes, kind='stable')
+        order = order[codes[order] >= 0]
+
+    x = data['X'].to_numpy(dtype=np.float64)
+    z = data['Z'].to_numpy(dtype=np.float64)
+    dt = data['Time_Diff'].to_numpy(dtype=np.float64)
+
+    # Time spent at the starting position, masked once for all targets so
+    # Orientation Time is a single reduction
+    at_start = (x == START_X) & (z == START_Z)
+    start_dt = np.where(at_start, dt, 0.0)
+
+    group_codes, metrics = _target_metrics_kernel(
+        codes[order],
+        x[order],
+        z[order],
+        data['Time'].to_numpy(dtype=np.float64)[order],
+        dt[order],
+        start_dt[order]
+    )
+
+    # Codes are in canonical order, so rows already follow TARGET_ORDER
+    # (only targets that exist in data are included)
+    df_results = pd.DataFrame(
+        metrics,
+        index=pd.CategoricalIndex(
+            pd.Categorical.from_codes(group_codes, dtype=TARGET_DTYPE),
+            name='Target_Name'
+        ),
+        columns=METRIC_COLUMNS
+    )
+    df_results['Teleportations'] = df_results['Teleportations'].astype(np.int64)
 
     return df_results
 
@@ -184,29 +314,177 @@ def calculate_block_metrics(data_folder: str, participant_id: str, block_num: in
     return calculate_all_metrics(data)
 
 
-def merge_block_results(data_folder: str, participant_ids: list) -> pd.DataFrame:
+def save_block_results(results: pd.DataFrame, output_dir: str, participant_id: str, block_num: int) -> str:
     """
-    Merge all block results into a single DataFrame.
+    Save one block's metrics as an intermediate file for later pipeline steps.
+
+    Written as b{n}_results.parquet when pyarrow is installed, otherwise as
+    b{n}_results.csv.
+
+    Args:
+        results: DataFrame from calculate_all_metrics()
+        output_dir: Base output folder path
+        participant_id: Participant ID (e.g., 'BNC01')
+        block_num: Block number (1, 2, or 3)
+
+    Returns:
+        Path of the file written
+    """
+    # The table is only a handful of rows, so it is written straight from its
+    # columns rather than through the pandas writers
+    names = ['Target_Name'] + list(results.columns)
+    columns = [results.index.astype(str).to_numpy()] + [results[col].to_numpy() for col in results.columns]
+
+    base_path = f"{output_dir}/{participant_id}/b{block_num}_results"
+    if HAS_PARQUET:
+        output_path = f"{base_path}.parquet"
+        table = pa.Table.from_arrays([pa.array(col) for col in columns], names=names)
+        pq.write_table(table, output_path, compression='zstd')
+    else:
+        output_path = f"{base_path}.csv"
+        with open(output_path, 'w', newline='') as f:
+            # Same layout as DataFrame.to_csv(): empty fields for NaN
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(names)
+            writer.writerows(zip(*([None if pd.isna(v) else v for v in col.tolist()] for col in columns)))
+    return output_path
+
+
+def load_block_results(data_folder: str, participant_id: str, block_num: int) -> pd.DataFrame:
+    """
+    Load one block's metrics saved by save_block_results().
+
+    Looks for b{n}_results.parquet first (when pyarrow is installed), then
+    falls back to b{n}_results.csv.
 
     Args:
         data_folder: Base data folder path
-        participant_ids: List of participant IDs
+        participant_id: Participant ID (e.g., 'BNC01')
+        block_num: Block number (1, 2, or 3)
 
     Returns:
-        DataFrame with all results (Participant, Block_Num, Target_Name, metrics...)
+        DataFrame with Target_Name and metric columns
+
+    Raises:
+        FileNotFoundError: If neither file exists
     """
-    all_results = []
+    base_path = f"{data_folder}/{participant_id}/b{block_num}_results"
+    if HAS_PARQUET and os.path.exists(f"{base_path}.parquet"):
+        df = pd.read_parquet(f"{base_path}.parquet")
+        # Files written via DataFrame.to_parquet() keep Target_Name as the index
+        return df if 'Target_Name' in df.columns else df.reset_index()
+    return pd.read_csv(f"{base_path}.csv")
 
+
+def _iter_block_results(data_folder: str, participant_ids: list) -> Iterator[Tuple[str, int, pd.DataFrame]]:
+    """
+    Read each participant's block results once, in participant/block order.
+
+    Yields (participant_id, block_num, df) where df already has the Participant
+    and Block_Num columns inserted. Missing files are reported and skipped.
+    """
     for pid in participant_ids:
         for block_num in range(1, 4):
             try:
-                filepath = f"{data_folder}/{pid}/b{block_num}_results.csv"
-                df = pd.read_csv(filepath)
-                df.insert(0, 'Participant', pid)
-                df.insert(1, 'Block_Num', block_num)
-                all_results.append(df)
+                df = load_block_results(data_folder, pid, block_num)
             except FileNotFoundError:
-                print(f"Warning: {filepath} not found")
+                print(f"Warning: {data_folder}/{pid}/b{block_num}_results not found")
+                continue
+
+            df.insert(0, 'Participant', pid)
+            df.insert(1, 'Block_Num', block_num)
+            yield pid, block_num, df
+
+
+def _iter_block_results_dict(block_results: Dict[Tuple[str, int], pd.DataFrame]) -> Iterator[Tuple[str, int, pd.DataFrame]]:
+    """
+    In-memory counterpart of _iter_block_results().
+
+    Yields the same (participant_id, block_num, df) tuples from results returned
+    by calculate_block_metrics(), keyed by (participant_id, block_num).
+    """
+    for (pid, block_num), results in block_results.items():
+        df = results.reset_index()
+        df.insert(0, 'Participant', pid)
+        df.insert(1, 'Block_Num', block_num)
+        yield pid, block_num, df
+
+
+def _average_row(pid: str, block_num: int, df: pd.DataFrame) -> dict:
+    """Mean of each metric across targets for one participant/block."""
+    row = {
+        'Participant': pid,
+        'Block_Num': block_num
+    }
+    for col in METRIC_COLUMNS:
+        row[col] = df[col].mean()
+    return row
+
+
+def merge_block_results(data_folder: str, participant_ids: list) -> pd.DataFrame:
+    """
+    Merge all block results into a single DataFrame.
+
+    Args:
+        data_folder: Base data folder path
+        participant_ids: List of participant IDs
+
+    Returns:
+        DataFrame with all results (Participant, Block_Num, Target_Name, metrics...)
+    """
+    all_results = [df for _, _, df in _iter_block_results(data_folder, participant_ids)]
+
+    if all_results:
+        return pd.concat(all_results, ignore_index=True)
+    return pd.DataFrame()
+
+
+def write_merged_results(data_folder: str, participant_ids: list, output_path: str) -> int:
+    """
+    Stream all block results into a single merged CSV file.
+
+    Produces the same file as merge_block_results(...).to_csv(output_path, index=False),
+    but appends each block as it is read instead of concatenating in memory.
+
+    Args:
+        data_folder: Base data folder path
+        participant_ids: List of participant IDs
+        output_path: Path of the merged CSV to write
+
+    Returns:
+        Number of rows written (the file is only created if this is non-zero)
+    """
+    rows_written = 0
+    out = None
+
+    try:
+        for _, _, df in _iter_block_results(data_folder, participant_ids):
+            if out is None:
+                out = open(output_path, 'w', newline='')
+                df.to_csv(out, index=False)
+            else:
+                df.to_csv(out, header=False, index=False)
+            rows_written += len(df)
+    finally:
+        if out is not None:
+            out.close()
+
+    return rows_written
+
+
+def merge_block_results_from_dict(block_results: Dict[Tuple[str, int], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge in-memory block results into a single DataFrame.
+
+    Same output as merge_block_results(), without re-reading the block result files.
+
+    Args:
+        block_results: Metrics DataFrames keyed by (participant_id, block_num)
+
+    Returns:
+        DataFrame with all results (Participant, Block_Num, Target_Name, metrics...)
+    """
+    all_results = [df for _, _, df in _iter_block_results_dict(block_results)]
 
     if all_results:
         return pd.concat(all_results, ignore_index=True)
@@ -224,29 +502,52 @@ def average_metrics(data_folder: str, participant_ids: list) -> pd.DataFrame:
     Returns:
         DataFrame with averaged metrics per participant per block
     """
-    results = []
-
-    metric_cols = [
-        'Total_Time', 'Orientation_Time', 'Navigation_Time',
-        'Distance', 'Speed', 'Mean_Dwell',
-        'Teleportations', 'Mean_Teleport_Distance'
+    results = [
+        _average_row(pid, block_num, df)
+        for pid, block_num, df in _iter_block_results(data_folder, participant_ids)
     ]
+    return pd.DataFrame(results)
 
-    for pid in participant_ids:
-        for block_num in range(1, 4):
-            try:
-                filepath = f"{data_folder}/{pid}/b{block_num}_results.csv"
-                df = pd.read_csv(filepath)
 
-                row = {
-                    'Participant': pid,
-                    'Block_Num': block_num
-                }
-                for col in metric_cols:
-                    row[col] = df[col].mean()
+def average_metrics_from_dict(block_results: Dict[Tuple[str, int], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Calculate average metrics across targets from in-memory block results.
 
-                results.append(row)
-            except FileNotFoundError:
-                print(f"Warning: {filepath} not found")
+    Same output as average_metrics(), without re-reading the block result files.
+
+    Args:
+        block_results: Metrics DataFrames keyed by (participant_id, block_num)
 
+    Returns:
+        DataFrame with averaged metrics per participant per block
+    """
+    results = [
+        _average_row(pid, block_num, df)
+        for pid, block_num, df in _iter_block_results_dict(block_results)
+    ]
     return pd.DataFrame(results)
+
+
+def merge_and_average(data_folder: str, participant_ids: list) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Merge and average block results in a single pass over the result files.
+
+    Equivalent to calling merge_block_results() and average_metrics(), but each
+    block result file is only read once.
+
+    Args:
+        data_folder: Base data folder path
+        participant_ids: List of participant IDs
+
+    Returns:
+        Tuple of (merged_df, averaged_df)
+    """
+    all_results = []
+    averaged = []
+
+    for pid, block_num, df in _iter_block_results(data_folder, participant_ids):
+        all_results.append(df)
+        averaged.append(_average_row(pid, block_num, df))
+
+    merged_df = pd.concat(all_results, ignore_index=True) if all_results else pd.DataFrame()
+    return merged_df, pd.DataFrame(averaged)
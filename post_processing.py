@@ -6,12 +6,24 @@ Handles file organization, renaming, and data corrections.
 
 import os
 import shutil
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import numpy as np
 import pandas as pd
 
 
+# Known erroneous entries in the older adult (OA) results, fixed by post_analysis_cleanup()
+KNOWN_FIXES = [
+    # BNC39 has erroneous Orientation_Time for Pawn Shop in block 1
+    {
+        'participant': 'BNC39',
+        'block_num': 1,
+        'target_name': 'Pawn Shop',
+        'column_to_fix': 'Orientation_Time'
+    },
+]
+
+
 def organize_and_rename_files(
     output_folder: str,
     ya_subfolder: str = "YA_Data",
@@ -74,6 +86,80 @@ def organize_and_rename_files(
     )
 
 
+def apply_fixes(
+    df_merged: pd.DataFrame,
+    df_averaged: pd.DataFrame,
+    fixes: List[Dict]
+) -> Tuple[pd.DataFrame, pd.DataFrame, bool, bool]:
+    """
+    Apply a batch of data fixes to merged and averaged results in memory.
+
+    For each fix the erroneous value is set to NaN (adjusting Total_Time when
+    fixing Orientation_Time), then the averaged value of that column is
+    recalculated for every affected participant. Both DataFrames are modified
+    in place and returned; nothing is written to disk. Fixes whose entry is
+    not found leave both DataFrames unchanged.
+
+    Args:
+        df_merged: Merged results (Participant, Block_Num, Target_Name, metrics...)
+        df_averaged: Averaged results (Participant, Block_Num, metrics...)
+        fixes: List of dicts with keys participant, block_num, target_name and
+            column_to_fix (see fix_erroneous_data())
+
+    Returns:
+        Tuple of (df_merged, df_averaged, merged_changed, averaged_changed),
+        where the flags tell whether any row of that DataFrame was modified
+    """
+    merged_changed = False
+    averaged_changed = False
+
+    fixes_df = pd.DataFrame(fixes, columns=['participant', 'block_num', 'target_name', 'column_to_fix'])
+    entry_keys = pd.MultiIndex.from_frame(df_merged[['Participant', 'Block_Num', 'Target_Name']])
+
+    for column_to_fix, column_fixes in fixes_df.groupby('column_to_fix', sort=False):
+        fix_keys = pd.MultiIndex.from_frame(column_fixes[['participant', 'block_num', 'target_name']])
+        found = fix_keys.isin(entry_keys)
+
+        for (participant, block_num, target_name), is_found in zip(fix_keys, found):
+            print(f"Fixing {participant} {target_name} {column_to_fix} error...")
+            if not is_found:
+                print(f"Entry not found for {participant} block {block_num} {target_name}")
+
+        # Find and fix all erroneous rows for this column at once
+        condition = entry_keys.isin(fix_keys[found])
+        if not condition.any():
+            continue
+
+        # If fixing Orientation_Time, also adjust Total_Time
+        if column_to_fix == 'Orientation_Time':
+            df_merged.loc[condition, 'Total_Time'] -= df_merged.loc[condition, 'Orientation_Time']
+
+        # Set erroneous values to NaN
+        df_merged.loc[condition, column_to_fix] = np.nan
+        merged_changed = True
+
+        # Recalculate averages for the affected participants
+        participants = fix_keys[found].unique(level=0)
+        new_avgs = df_merged.groupby('Participant', sort=False)[column_to_fix].mean().reindex(participants)
+
+        for participant, new_avg in new_avgs.items():
+            if pd.isna(new_avg):
+                print(f"No valid {column_to_fix} values found for {participant}")
+            else:
+                print(f"New average {column_to_fix} for {participant}: {new_avg:.6f}")
+
+        new_avgs = new_avgs.dropna()
+        participant_condition = df_averaged['Participant'].isin(new_avgs.index)
+        df_averaged.loc[participant_condition, column_to_fix] = (
+            df_averaged.loc[participant_condition, 'Participant'].map(new_avgs)
+        )
+        for participant in df_averaged.loc[participant_condition, 'Participant'].unique():
+            print(f"Updated {participant}'s averaged {column_to_fix}")
+        averaged_changed = averaged_changed or bool(participant_condition.any())
+
+    return df_merged, df_averaged, merged_changed, averaged_changed
+
+
 def fix_erroneous_data(
     merged_csv_path: str,
     averaged_csv_path: str,
@@ -85,7 +171,8 @@ def fix_erroneous_data(
     """
     Fix erroneous data for a specific participant/block/target.
 
-    Sets the specified column value to NaN and recalculates averages.
+    Sets the specified column value to NaN and recalculates averages. To apply
+    several fixes, load the files once and use apply_fixes() instead.
 
     Args:
         merged_csv_path: Path to merged results CSV
@@ -95,52 +182,34 @@ def fix_erroneous_data(
         target_name: Target name with error
         column_to_fix: Column containing erroneous data
     """
-    print(f"Fixing {participant} {target_name} {column_to_fix} error...")
+    fix = {
+        'participant': participant,
+        'block_num': block_num,
+        'target_name': target_name,
+        'column_to_fix': column_to_fix
+    }
+    _fix_results_files(merged_csv_path, averaged_csv_path, [fix])
 
-    # Load merged results
-    df_merged = pd.read_csv(merged_csv_path)
 
-    # Find and fix the erroneous row
-    condition = (
-        (df_merged['Participant'] == participant) &
-        (df_merged['Block_Num'] == block_num) &
-        (df_merged['Target_Name'] == target_name)
+def _fix_results_files(merged_csv_path: str, averaged_csv_path: str, fixes: List[Dict]) -> None:
+    """
+    Load merged/averaged CSVs once, apply all fixes, and write back only the
+    files whose contents changed.
+    """
+    df_merged, df_averaged, merged_changed, averaged_changed = apply_fixes(
+        pd.read_csv(merged_csv_path),
+        pd.read_csv(averaged_csv_path),
+        fixes
     )
 
-    if not condition.any():
-        print(f"Entry not found for {participant} block {block_num} {target_name}")
-        return
-
-    # If fixing Orientation_Time, also adjust Total_Time
-    if column_to_fix == 'Orientation_Time':
-        old_orientation = df_merged.loc[condition, 'Orientation_Time'].values[0]
-        df_merged.loc[condition, 'Total_Time'] -= old_orientation
-
-    # Set erroneous value to NaN
-    df_merged.loc[condition, column_to_fix] = np.nan
-
-    # Save corrected merged results
-    df_merged.to_csv(merged_csv_path, index=False)
-    print(f"Corrected merged results saved to {merged_csv_path}")
+    # Save corrected results
+    if merged_changed:
+        df_merged.to_csv(merged_csv_path, index=False)
+        print(f"Corrected merged results saved to {merged_csv_path}")
 
-    # Recalculate average for this participant
-    participant_data = df_merged[df_merged['Participant'] == participant]
-    valid_values = participant_data[column_to_fix].dropna()
-
-    if len(valid_values) > 0:
-        new_avg = valid_values.mean()
-        print(f"New average {column_to_fix} for {participant}: {new_avg:.6f}")
-
-        # Update averaged results
-        df_averaged = pd.read_csv(averaged_csv_path)
-        participant_condition = df_averaged['Participant'] == participant
-
-        if participant_condition.any():
-            df_averaged.loc[participant_condition, column_to_fix] = new_avg
-            df_averaged.to_csv(averaged_csv_path, index=False)
-            print(f"Updated {participant}'s averaged {column_to_fix}")
-    else:
-        print(f"No valid {column_to_fix} values found for {participant}")
+    if averaged_changed:
+        df_averaged.to_csv(averaged_csv_path, index=False)
+        print(f"Corrected averaged results saved to {averaged_csv_path}")
 
 
 def post_analysis_cleanup(output_folder: str) -> None:
@@ -148,7 +217,7 @@ def post_analysis_cleanup(output_folder: str) -> None:
     Run post-analysis cleanup operations.
 
     1. Organizes and renames output files
-    2. Fixes known erroneous data (BNC39 Pawn Shop Orientation_Time)
+    2. Fixes known erroneous data (see KNOWN_FIXES)
 
     Args:
         output_folder: Base output folder path (where results were saved)
@@ -156,17 +225,9 @@ def post_analysis_cleanup(output_folder: str) -> None:
     # Step 1: Organize files
     ya_merged, ya_avg, oa_merged, oa_avg = organize_and_rename_files(output_folder)
 
-    # Step 2: Fix known errors
-    # BNC39 has erroneous Orientation_Time for Pawn Shop in block 1
+    # Step 2: Fix known errors, reading and writing each file once
     if oa_merged and oa_avg and os.path.exists(oa_merged) and os.path.exists(oa_avg):
-        fix_erroneous_data(
-            merged_csv_path=oa_merged,
-            averaged_csv_path=oa_avg,
-            participant='BNC39',
-            block_num=1,
-            target_name='Pawn Shop',
-            column_to_fix='Orientation_Time'
-        )
+        _fix_results_files(oa_merged, oa_avg, KNOWN_FIXES)
 
     print("Post-analysis cleanup completed!")
 
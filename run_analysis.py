@@ -17,36 +17,54 @@ Usage:
 Key improvements over original notebooks:
 - Vectorized pandas operations instead of row-by-row iteration
 - Single-pass data processing where possible
-- Proper memory management (closing matplotlib figures)
+- Bounded plotting memory (one reused matplotlib figure per process)
 - Command-line interface for flexibility
 - Modular design for easier testing and maintenance
 - No Jupyter-specific magic commands (%store, %run)
 """
 
 import argparse
+import logging
 import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
 
 from metrics import (
     process_raw_data,
     calculate_all_metrics,
-    merge_block_results,
+    calculate_block_metrics,
+    save_block_results,
+    write_merged_results,
     average_metrics,
+    merge_and_average,
+    merge_block_results_from_dict,
+    average_metrics_from_dict,
 )
 from visualization import (
     generate_participant_movement_plots,
     extract_target_trajectories,
     plot_target_maps,
+    run_all,
 )
 from post_processing import post_analysis_cleanup
 
 
+# Raw CSVs parsed ahead of the block being computed when running sequentially
+PREFETCH_DEPTH = 2
+
+
 def get_participant_ids(data_folder: str) -> List[str]:
     """
     Get list of participant IDs from a data folder.
 
-    Looks for directories starting with 'BNC' or 'NAV'.
+    Looks for directories starting with 'BNC' or 'NAV'. The folder is only
+    scanned once per process; later calls reuse the cached result.
 
     Args:
         data_folder: Path to the data folder
@@ -54,24 +72,89 @@ def get_participant_ids(data_folder: str) -> List[str]:
     Returns:
         Sorted list of participant IDs
     """
-    participant_ids = []
-    for item in os.listdir(data_folder):
-        item_path = os.path.join(data_folder, item)
-        if os.path.isdir(item_path) and (item.startswith('BNC') or item.startswith('NAV')):
-            participant_ids.append(item)
-    return sorted(participant_ids)
+    return list(_scan_participant_ids(data_folder))
+
+
+@lru_cache(maxsize=None)
+def _scan_participant_ids(data_folder: str) -> Tuple[str, ...]:
+    """Scan a data folder once; DirEntry.is_dir() reuses the directory listing's file type."""
+    with os.scandir(data_folder) as entries:
+        return tuple(sorted(
+            entry.name for entry in entries
+            if entry.name.startswith(('BNC', 'NAV')) and entry.is_dir()
+        ))
+
+
+def _iter_block_metrics(
+    data_folder: str,
+    tasks: List[Tuple[str, int]],
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Tuple[str, int], Callable[[], pd.DataFrame]]]:
+    """
+    Calculate metrics for each (participant_id, block_num) task.
 
+    Yields (task, get_results) pairs; calling get_results() returns the metrics
+    DataFrame or raises the error hit while processing that block.
 
-def run_metrics_calculation(data_folder: str, participant_ids: List[str], output_dir: Optional[str] = None) -> None:
+    With more than one worker, blocks run in a process pool and are yielded as
+    they complete. With a single worker, blocks are yielded in order and the
+    next raw CSVs are parsed in background threads while the current block's
+    metrics are computed, overlapping file I/O with computation.
+    """
+    if max_workers == 1:
+        with ThreadPoolExecutor(max_workers=PREFETCH_DEPTH) as executor:
+            def load(task):
+                pid, block_num = task
+                return executor.submit(
+                    process_raw_data, f"{data_folder}/{pid}/Saved_data_{pid}_t{block_num}.csv"
+                )
+
+            # Keep at most PREFETCH_DEPTH parsed-or-parsing blocks in flight
+            pending = deque((task, load(task)) for task in tasks[:PREFETCH_DEPTH])
+            upcoming = iter(tasks[PREFETCH_DEPTH:])
+
+            while pending:
+                task, data_future = pending.popleft()
+                next_task = next(upcoming, None)
+                if next_task is not None:
+                    pending.append((next_task, load(next_task)))
+
+                yield task, lambda future=data_future: calculate_all_metrics(future.result())
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(calculate_block_metrics, data_folder, pid, block_num): (pid, block_num)
+            for pid, block_num in tasks
+        }
+
+        for future in as_completed(futures):
+            yield futures[future], future.result
+
+
+def run_metrics_calculation(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    max_workers: Optional[int] = None
+) -> Dict[Tuple[str, int], pd.DataFrame]:
     """
     Step 1: Calculate metrics for all participants and blocks.
 
-    Creates b1_results.csv, b2_results.csv, b3_results.csv for each participant.
+    Creates b1_results, b2_results, b3_results for each participant (Parquet
+    when pyarrow is installed, otherwise CSV). Blocks are independent, so they
+    are processed in parallel worker processes.
 
     Args:
         data_folder: Path to the input data folder
         participant_ids: List of participant IDs
         output_dir: Optional output directory (defaults to data_folder)
+        max_workers: Number of worker processes (defaults to CPU count); with 1,
+            blocks run sequentially with the next CSVs prefetched in threads
+
+    Returns:
+        Metrics DataFrames keyed by (participant_id, block_num), in participant/block
+        order, for the blocks that were processed successfully
     """
     if output_dir is None:
         output_dir = data_folder
@@ -80,33 +163,39 @@ def run_metrics_calculation(data_folder: str, participant_ids: List[str], output
     print("Step 1: Calculating metrics for all participants...")
     print(f"{'='*60}")
 
-    total = len(participant_ids) * 3
+    tasks = [(pid, block_num) for pid in participant_ids for block_num in range(1, 4)]
+    total = len(tasks)
     count = 0
+    completed = {}
+
+    for (pid, block_num), get_results in _iter_block_metrics(data_folder, tasks, max_workers):
+        count += 1
+        try:
+            results = get_results()
 
-    for pid in participant_ids:
-        for block_num in range(1, 4):
-            count += 1
-            try:
-                filepath = f"{data_folder}/{pid}/Saved_data_{pid}_t{block_num}.csv"
-                data = process_raw_data(filepath)
-                results = calculate_all_metrics(data)
+            # Create participant output directory if needed
+            os.makedirs(os.path.join(output_dir, pid), exist_ok=True)
 
-                # Create participant output directory if needed
-                participant_output_dir = os.path.join(output_dir, pid)
-                os.makedirs(participant_output_dir, exist_ok=True)
+            output_path = save_block_results(results, output_dir, pid, block_num)
+            completed[(pid, block_num)] = results
 
-                output_path = f"{participant_output_dir}/b{block_num}_results.csv"
-                results.to_csv(output_path)
+            print(f"[{count}/{total}] Created: {output_path}")
 
-                print(f"[{count}/{total}] Created: {output_path}")
+        except FileNotFoundError:
+            print(f"[{count}/{total}] Warning: Data not found for {pid} block {block_num}")
+        except Exception as e:
+            print(f"[{count}/{total}] Error processing {pid} block {block_num}: {e}")
 
-            except FileNotFoundError:
-                print(f"[{count}/{total}] Warning: Data not found for {pid} block {block_num}")
-            except Exception as e:
-                print(f"[{count}/{total}] Error processing {pid} block {block_num}: {e}")
+    # Blocks may complete out of order; keep the participant/block order of the files
+    return {task: completed[task] for task in tasks if task in completed}
 
 
-def run_merge(data_folder: str, participant_ids: List[str], output_dir: Optional[str] = None) -> None:
+def run_merge(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    block_results: Optional[Dict[Tuple[str, int], pd.DataFrame]] = None
+) -> None:
     """
     Step 2: Merge all block results into a single file.
 
@@ -116,6 +205,8 @@ def run_merge(data_folder: str, participant_ids: List[str], output_dir: Optional
         data_folder: Path to the input data folder
         participant_ids: List of participant IDs
         output_dir: Optional output directory (defaults to data_folder)
+        block_results: Results from run_metrics_calculation(); if given, these are
+            used instead of re-reading the block result files
     """
     if output_dir is None:
         output_dir = data_folder
@@ -124,19 +215,29 @@ def run_merge(data_folder: str, participant_ids: List[str], output_dir: Optional
     print("Step 2: Merging block results...")
     print(f"{'='*60}")
 
-    # Use output_dir for reading block results if they were saved there
-    merged_df = merge_block_results(output_dir, participant_ids)
+    output_path = f"{output_dir}/merged_results.csv"
+    if block_results is not None:
+        merged_df = merge_block_results_from_dict(block_results)
+        if not merged_df.empty:
+            merged_df.to_csv(output_path, index=False)
+        total_rows = len(merged_df)
+    else:
+        # Use output_dir for reading block results if they were saved there
+        total_rows = write_merged_results(output_dir, participant_ids, output_path)
 
-    if not merged_df.empty:
-        output_path = f"{output_dir}/merged_results.csv"
-        merged_df.to_csv(output_path, index=False)
+    if total_rows:
         print(f"Created: {output_path}")
-        print(f"Total rows: {len(merged_df)}")
+        print(f"Total rows: {total_rows}")
     else:
         print("Warning: No data to merge")
 
 
-def run_average(data_folder: str, participant_ids: List[str], output_dir: Optional[str] = None) -> None:
+def run_average(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    block_results: Optional[Dict[Tuple[str, int], pd.DataFrame]] = None
+) -> None:
     """
     Step 3: Calculate averaged metrics per participant per block.
 
@@ -146,6 +247,8 @@ def run_average(data_folder: str, participant_ids: List[str], output_dir: Option
         data_folder: Path to the input data folder
         participant_ids: List of participant IDs
         output_dir: Optional output directory (defaults to data_folder)
+        block_results: Results from run_metrics_calculation(); if given, these are
+            used instead of re-reading the block result files
     """
     if output_dir is None:
         output_dir = data_folder
@@ -154,8 +257,11 @@ def run_average(data_folder: str, participant_ids: List[str], output_dir: Option
     print("Step 3: Averaging metrics across targets...")
     print(f"{'='*60}")
 
-    # Use output_dir for reading block results if they were saved there
-    averaged_df = average_metrics(output_dir, participant_ids)
+    if block_results is not None:
+        averaged_df = average_metrics_from_dict(block_results)
+    else:
+        # Use output_dir for reading block results if they were saved there
+        averaged_df = average_metrics(output_dir, participant_ids)
 
     if not averaged_df.empty:
         output_path = f"{output_dir}/averaged_results.csv"
@@ -166,6 +272,49 @@ def run_average(data_folder: str, participant_ids: List[str], output_dir: Option
         print("Warning: No data to average")
 
 
+def run_merge_and_average(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    block_results: Optional[Dict[Tuple[str, int], pd.DataFrame]] = None
+) -> None:
+    """
+    Steps 2 and 3 combined: merge and average block results in one pass.
+
+    Creates merged_results.csv and averaged_results.csv while reading each
+    block result file only once.
+
+    Args:
+        data_folder: Path to the input data folder
+        participant_ids: List of participant IDs
+        output_dir: Optional output directory (defaults to data_folder)
+        block_results: Results from run_metrics_calculation(); if given, these are
+            used instead of re-reading the block result files
+    """
+    if output_dir is None:
+        output_dir = data_folder
+
+    print(f"\n{'='*60}")
+    print("Steps 2-3: Merging and averaging block results...")
+    print(f"{'='*60}")
+
+    if block_results is not None:
+        merged_df = merge_block_results_from_dict(block_results)
+        averaged_df = average_metrics_from_dict(block_results)
+    else:
+        # Use output_dir for reading block results if they were saved there
+        merged_df, averaged_df = merge_and_average(output_dir, participant_ids)
+
+    for df, name, label in [(merged_df, 'merged', 'merge'), (averaged_df, 'averaged', 'average')]:
+        if not df.empty:
+            output_path = f"{output_dir}/{name}_results.csv"
+            df.to_csv(output_path, index=False)
+            print(f"Created: {output_path}")
+            print(f"Total rows: {len(df)}")
+        else:
+            print(f"Warning: No data to {label}")
+
+
 def run_trajectories(data_folder: str, participant_ids: List[str], output_dir: Optional[str] = None) -> None:
     """
     Step 4: Extract target-specific trajectory data.
@@ -187,16 +336,25 @@ def run_trajectories(data_folder: str, participant_ids: List[str], output_dir: O
     extract_target_trajectories(data_folder, participant_ids, output_dir)
 
 
-def run_plots(data_folder: str, participant_ids: List[str], output_dir: Optional[str] = None) -> None:
+def run_plots(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    force: bool = False
+) -> None:
     """
     Step 5: Generate visualization plots.
 
-    Creates movement plots for each participant and target maps.
+    Creates movement plots for each participant and target maps. Plots newer
+    than their input data are skipped unless force is set.
 
     Args:
         data_folder: Path to the input data folder
         participant_ids: List of participant IDs
         output_dir: Optional output directory (defaults to data_folder)
+        max_workers: Number of worker processes (defaults to CPU count)
+        force: Re-render all plots even if they are up to date
     """
     if output_dir is None:
         output_dir = data_folder
@@ -206,10 +364,40 @@ def run_plots(data_folder: str, participant_ids: List[str], output_dir: Optional
     print(f"{'='*60}")
 
     print("\nGenerating participant movement plots...")
-    generate_participant_movement_plots(data_folder, participant_ids, output_dir)
+    generate_participant_movement_plots(data_folder, participant_ids, output_dir, max_workers, force)
 
     print("\nGenerating target maps...")
-    plot_target_maps(output_dir)
+    plot_target_maps(output_dir, max_workers=max_workers, force=force)
+
+
+def run_trajectories_and_plots(
+    data_folder: str,
+    participant_ids: List[str],
+    output_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    force: bool = False
+) -> None:
+    """
+    Steps 4 and 5 combined: extract trajectories and generate plots in one pass.
+
+    Creates the Target_Data/ files, movement plots and target maps while
+    reading each raw data file only once.
+
+    Args:
+        data_folder: Path to the input data folder
+        participant_ids: List of participant IDs
+        output_dir: Optional output directory (defaults to data_folder)
+        max_workers: Number of worker processes (defaults to CPU count)
+        force: Re-render all plots even if they are up to date
+    """
+    if output_dir is None:
+        output_dir = data_folder
+
+    print(f"\n{'='*60}")
+    print("Steps 4-5: Extracting target trajectories and generating plots...")
+    print(f"{'='*60}")
+
+    run_all(data_folder, participant_ids, output_dir, max_workers, force)
 
 
 def run_post_process(base_data_folder: str, output_dir: Optional[str] = None) -> None:
@@ -235,7 +423,9 @@ def run_post_process(base_data_folder: str, output_dir: Optional[str] = None) ->
 def process_data_folder(
     data_folder: str,
     steps: Optional[List[str]] = None,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    force_plots: bool = False
 ) -> None:
     """
     Process a single data folder through the analysis pipeline.
@@ -244,6 +434,8 @@ def process_data_folder(
         data_folder: Path to the data folder
         steps: List of steps to run (default: all except post-process)
         output_dir: Optional output directory (defaults to data_folder)
+        max_workers: Number of worker processes for parallel steps (defaults to CPU count)
+        force_plots: Re-render all plots even if they are up to date
     """
     if steps is None:
         steps = ['metrics', 'merge', 'average', 'trajectories', 'plots']
@@ -268,21 +460,25 @@ def process_data_folder(
     # Create output directory if needed
     os.makedirs(output_dir, exist_ok=True)
 
-    # Run requested steps
+    # Run requested steps; block results computed in this run are passed on
+    # in memory rather than re-read from disk
+    block_results = None
     if 'metrics' in steps:
-        run_metrics_calculation(data_folder, participant_ids, output_dir)
-
-    if 'merge' in steps:
-        run_merge(data_folder, participant_ids, output_dir)
-
-    if 'average' in steps:
-        run_average(data_folder, participant_ids, output_dir)
-
-    if 'trajectories' in steps:
+        block_results = run_metrics_calculation(data_folder, participant_ids, output_dir, max_workers)
+
+    if 'merge' in steps and 'average' in steps:
+        run_merge_and_average(data_folder, participant_ids, output_dir, block_results)
+    elif 'merge' in steps:
+        run_merge(data_folder, participant_ids, output_dir, block_results)
+    elif 'average' in steps:
+        run_average(data_folder, participant_ids, output_dir, block_results)
+
+    if 'trajectories' in steps and 'plots' in steps:
+        run_trajectories_and_plots(data_folder, participant_ids, output_dir, max_workers, force_plots)
+    elif 'trajectories' in steps:
         run_trajectories(data_folder, participant_ids, output_dir)
-
-    if 'plots' in steps:
-        run_plots(data_folder, participant_ids, output_dir)
+    elif 'plots' in steps:
+        run_plots(data_folder, participant_ids, output_dir, max_workers, force_plots)
 
 
 def main():
@@ -329,6 +525,18 @@ Available steps:
         help='Output directory for results (defaults to data folder)'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Number of worker processes for parallel steps (defaults to CPU count)'
+    )
+
+    parser.add_argument(
+        '--force-plots',
+        action='store_true',
+        help='Re-render plots even if they are newer than their input data'
+    )
+
     parser.add_argument(
         '--steps',
         nargs='+',
@@ -339,9 +547,16 @@ Available steps:
 
     args = parser.parse_args()
 
+    # Show the visualization module's progress messages alongside the printed
+    # output; other libraries' loggers stay at the default WARNING level
+    logging.basicConfig(format='%(message)s', stream=sys.stdout)
+    logging.getLogger('visualization').setLevel(logging.INFO)
+
     # Validate arguments
     if not args.data_folders and not args.base_folder:
         parser.error("Must specify --data-folders or --base-folder")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
 
     # Process each data folder
     if args.data_folders:
@@ -362,7 +577,7 @@ Available steps:
             else:
                 output_dir = None
 
-            process_data_folder(folder, non_post_steps, output_dir)
+            process_data_folder(folder, non_post_steps, output_dir, args.workers, args.force_plots)
 
     # Run post-processing if requested
     if 'post-process' in args.steps:
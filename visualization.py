@@ -1,18 +1,32 @@
 """
 Visualization functions for NavCity analysis.
 
-This module handles trajectory plotting and map generation with proper
-memory management (closing figures after saving).
+This module handles trajectory plotting and map generation with bounded
+memory use: each process draws every plot on one reused figure.
 """
 
+import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+import matplotlib
+matplotlib.use('Agg')  # Render off-screen; worker processes never touch a GUI
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 
-from metrics import TARGET_ORDER, process_raw_data
+from metrics import HAS_PARQUET, TARGET_DTYPE, TARGET_ORDER, process_raw_data
+
+
+logger = logging.getLogger(__name__)
+
+# (logging level, message) reported by a plotting task back to the main process
+Status = Tuple[int, str]
 
 
 # Color scheme for targets
@@ -27,10 +41,98 @@ TARGET_COLORS = {
     'High School': '#ff8a33'
 }
 
+# Movement plots draw (and list in the legend) targets alphabetically
+_TARGET_DRAW_ORDER = np.argsort(TARGET_ORDER)
+_TARGET_DRAW_RANK = np.argsort(_TARGET_DRAW_ORDER)
+_TARGET_LINE_COLORS = [TARGET_COLORS.get(target, '#000000') for target in TARGET_ORDER]
+
+# Legend handles for each target code, built once and shared by every
+# movement plot (legends copy their handles' styles rather than drawing them)
+_LEGEND_HANDLES = [
+    Line2D([], [], color=color, alpha=0.7, label=target)
+    for target, color in zip(TARGET_ORDER, _TARGET_LINE_COLORS)
+]
+
 # Plot boundaries
 X_LIMITS = (-80, 80)
 Z_LIMITS = (-60, 80)
 
+# Write buffer for trajectory CSV files
+CSV_BUFFER_SIZE = 1 << 20
+
+# Fixed subplot margins; the axis limits are constant, so the layout can be
+# set once instead of measured with bbox_inches='tight' on every save
+FIGURE_MARGINS = {'left': 0.08, 'right': 0.98, 'top': 0.94, 'bottom': 0.08}
+
+# PNG save options; zlib level 1 encodes much faster than the default level 6
+# for only slightly larger files
+SAVE_KWARGS = {'dpi': 150, 'pil_kwargs': {'compress_level': 1}}
+
+# Figure and axes reused by every plot drawn in this process (see _get_axes)
+_FIGURE = None
+_AXES = None
+
+# Parse types for target map loads; float32 is ample for pixel positions
+TARGET_FILE_DTYPES = {
+    'Participant': 'category',
+    'Block_num': 'int8',
+    'X': 'float32',
+    'Z': 'float32'
+}
+
+# Target files larger than this are streamed in chunks of
+# TARGET_FILE_CHUNK_ROWS rows instead of being parsed in one go
+TARGET_FILE_STREAM_BYTES = 256 << 20
+TARGET_FILE_CHUNK_ROWS = 200_000
+
+
+def _get_axes():
+    """
+    Return the cached figure and cleared axes for the next plot.
+
+    The figure is created on first use in each process and is not registered
+    with pyplot, so it never needs closing and never accumulates.
+    """
+    global _FIGURE, _AXES
+    if _FIGURE is None:
+        _FIGURE = Figure(figsize=(10, 8))
+        _FIGURE.subplots_adjust(**FIGURE_MARGINS)
+        _AXES = _FIGURE.add_subplot()
+    else:
+        _AXES.clear()
+    return _FIGURE, _AXES
+
+
+def _is_up_to_date(output_path: str, input_path: str) -> bool:
+    """Return True if output_path exists and is at least as new as input_path."""
+    return (
+        os.path.exists(output_path)
+        and os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    )
+
+
+def _run_tasks(
+    func: Callable,
+    tasks: List[Tuple],
+    max_workers: Optional[int] = None
+) -> Iterator:
+    """
+    Run func(*task) for each task and yield the results.
+
+    With more than one worker, tasks run in a process pool and results are
+    yielded as tasks complete; with a single worker, tasks run in order in
+    the current process.
+    """
+    if max_workers == 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(func, *task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
 
 def plot_participant_movement(
     data: pd.DataFrame,
@@ -45,11 +147,37 @@ def plot_participant_movement(
         output_path: Path to save the figure
         title: Optional plot title
     """
-    fig, ax = plt.subplots(figsize=(10, 8))
+    # Ensure output directory exists
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-    for target_name, group in data.groupby('Target_Name'):
-        color = TARGET_COLORS.get(target_name, '#000000')
-        ax.plot(group['X'], group['Z'], color=color, label=target_name, alpha=0.7)
+    _draw_movement(data, output_path, title)
+
+
+def _draw_movement(data: pd.DataFrame, output_path: str, title: Optional[str] = None) -> None:
+    """Draw and save a movement plot into an existing output directory."""
+    fig, ax = _get_axes()
+
+    # Order rows by target (alphabetically, not in category order), keeping
+    # visit order within each target, and split them into one line per target
+    targets = data['Target_Name']
+    if targets.dtype != TARGET_DTYPE:
+        targets = targets.astype(TARGET_DTYPE)
+    codes = targets.cat.codes.to_numpy()
+    present = np.flatnonzero(codes >= 0)
+    order = present[np.argsort(_TARGET_DRAW_RANK[codes[present]], kind='stable')]
+    counts = np.bincount(codes[present], minlength=len(TARGET_ORDER))
+    line_codes = [code for code in _TARGET_DRAW_ORDER if counts[code]]
+    xz = np.column_stack((data['X'].to_numpy(), data['Z'].to_numpy()))[order]
+    segments = np.split(xz, np.cumsum(counts[line_codes])[:-1]) if line_codes else []
+
+    # Draw all targets as one collection, with the cached legend handles of
+    # the targets present
+    colors = [_TARGET_LINE_COLORS[code] for code in line_codes]
+    ax.add_collection(LineCollection(
+        segments, colors=colors, alpha=0.7, linewidths=plt.rcParams['lines.linewidth'],
+        capstyle='projecting', joinstyle='round'
+    ))
+    handles = [_LEGEND_HANDLES[code] for code in line_codes]
 
     ax.set_xlim(X_LIMITS)
     ax.set_ylim(Z_LIMITS)
@@ -59,49 +187,222 @@ def plot_participant_movement(
     if title:
         ax.set_title(title)
 
-    ax.legend(loc='upper right', fontsize=8)
+    if handles:
+        ax.legend(handles=handles, loc='upper right', fontsize=8)
 
-    # Ensure output directory exists
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_path, **SAVE_KWARGS)
+
+
+def _movement_tasks(
+    data_folder: str,
+    participant_ids: list,
+    output_dir: str,
+    force: bool
+) -> List[Tuple[str, int, Path, Path, bool]]:
+    """
+    Build the per-block movement plot tasks, creating each participant's
+    output directory once.
+
+    The directory is only created for participants with at least one raw data
+    file, so participants without data leave no empty folder behind.
+
+    Returns:
+        List of (pid, block_num, input_dir, participant_output_dir, force) tuples
+    """
+    tasks = []
+    for pid in participant_ids:
+        input_dir = Path(data_folder) / pid
+        participant_output_dir = Path(output_dir) / pid
+
+        try:
+            input_files = set(os.listdir(input_dir))
+        except FileNotFoundError:
+            input_files = set()
+        if any(f"Saved_data_{pid}_t{block_num}.csv" in input_files for block_num in range(1, 4)):
+            participant_output_dir.mkdir(parents=True, exist_ok=True)
+
+        for block_num in range(1, 4):
+            tasks.append((pid, block_num, input_dir, participant_output_dir, force))
+    return tasks
+
+
+def _render_one(
+    pid: str,
+    block_num: int,
+    input_dir: Path,
+    participant_output_dir: Path,
+    force: bool = False
+) -> Status:
+    """
+    Render the movement plot for one participant/block.
+
+    Returns:
+        Status for the main process to log
+    """
+    try:
+        filepath = input_dir / f"Saved_data_{pid}_t{block_num}.csv"
+        output_path = participant_output_dir / f"b{block_num}_movement.png"
 
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close(fig)
+        # Skip plots that are newer than their raw data
+        if not force and _is_up_to_date(output_path, filepath):
+            return logging.INFO, f"Up to date: {output_path}"
+
+        # Parsed with the default dtypes so the plot matches the one run_all()
+        # draws from the same float64 frame it uses for trajectories
+        data = process_raw_data(filepath)
+        _draw_movement(data, output_path, f"{pid} - Block {block_num}")
+        return logging.INFO, f"Created: {output_path}"
+
+    except FileNotFoundError:
+        return logging.WARNING, f"Warning: Data not found for {pid} block {block_num}"
 
 
 def generate_participant_movement_plots(
     data_folder: str,
     participant_ids: list,
-    output_dir: str = None
+    output_dir: str = None,
+    max_workers: Optional[int] = None,
+    force: bool = False
 ) -> None:
     """
     Generate movement plots for all participants and blocks.
 
+    Plots already newer than their raw data file are not re-rendered.
+
     Args:
         data_folder: Base data folder path (input data location)
         participant_ids: List of participant IDs
         output_dir: Output directory for plots (defaults to data_folder)
+        max_workers: Number of worker processes (defaults to CPU count);
+            with 1, plots are rendered sequentially in the current process
+        force: Re-render every plot even if it is up to date
     """
     if output_dir is None:
         output_dir = data_folder
 
-    for pid in participant_ids:
-        for block_num in range(1, 4):
-            try:
-                filepath = f"{data_folder}/{pid}/Saved_data_{pid}_t{block_num}.csv"
-                data = process_raw_data(filepath)
+    tasks = _movement_tasks(data_folder, participant_ids, output_dir, force)
 
-                # Create participant output directory if needed
-                participant_output_dir = os.path.join(output_dir, pid)
-                os.makedirs(participant_output_dir, exist_ok=True)
+    for level, message in _run_tasks(_render_one, tasks, max_workers):
+        logger.log(level, message)
 
-                output_path = f"{participant_output_dir}/b{block_num}_movement.png"
-                title = f"{pid} - Block {block_num}"
 
-                plot_participant_movement(data, output_path, title)
-                print(f"Created: {output_path}")
+def _new_buffer() -> Dict[str, List[np.ndarray]]:
+    """Return empty column buffers for one target trajectory file."""
+    return {'X': [], 'Z': [], 'pid': [], 'block': []}
+
+
+def _new_target_buffers() -> Tuple[Dict[int, Dict[str, dict]], Dict[str, dict]]:
+    """
+    Return empty column buffers for every target trajectory file.
+
+    Rows are collected as NumPy arrays and only become DataFrames when saved.
+
+    Returns:
+        Tuple of (block_data, all_data): buffers keyed by block number and
+        target, and buffers keyed by target for the combined files
+    """
+    block_data = {block: {target: _new_buffer() for target in TARGET_ORDER} for block in range(1, 4)}
+    all_data = {target: _new_buffer() for target in TARGET_ORDER}
+    return block_data, all_data
 
-            except FileNotFoundError:
-                print(f"Warning: Data not found for {pid} block {block_num}")
+
+def _block_trajectories(data: pd.DataFrame) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Extract the unique positions visited for each target in one block.
+
+    Args:
+        data: Preprocessed DataFrame from process_raw_data()
+
+    Returns:
+        List of (target, x, z) tuples, keeping the last occurrence of each
+        position in visit order
+    """
+    targets = data['Target_Name']
+    if targets.dtype != TARGET_DTYPE:
+        targets = targets.astype(TARGET_DTYPE)
+    codes = targets.cat.codes.to_numpy()
+    n = len(codes)
+
+    # Deduplicate all targets in a single pass: view each (X, Z, code) row as
+    # one opaque 24-byte key (+ 0.0 folds -0.0 into 0.0) and keep the last
+    # occurrence of each key
+    keys = np.empty((n, 3))
+    np.add(data['X'].to_numpy(), 0.0, out=keys[:, 0])
+    np.add(data['Z'].to_numpy(), 0.0, out=keys[:, 1])
+    keys[:, 2] = codes
+    _, first_from_end = np.unique(keys.view(np.dtype((np.void, 24))).ravel()[::-1], return_index=True)
+    keep = np.sort(n - 1 - first_from_end)
+    keep = keep[codes[keep] >= 0]
+
+    # Split the kept rows by target, preserving visit order within each
+    keep = keep[np.argsort(codes[keep], kind='stable')]
+    kept_codes = codes[keep]
+    bounds = np.flatnonzero(np.diff(kept_codes)) + 1
+    categories = TARGET_DTYPE.categories
+
+    return [
+        (categories[part_codes[0]], x, z)
+        for part_codes, x, z in zip(
+            np.split(kept_codes, bounds),
+            np.split(data['X'].to_numpy()[keep], bounds),
+            np.split(data['Z'].to_numpy()[keep], bounds)
+        )
+        if part_codes.size
+    ]
+
+
+def _add_trajectories(
+    block_data: Dict[int, Dict[str, dict]],
+    all_data: Dict[str, dict],
+    trajectories: List[Tuple[str, np.ndarray, np.ndarray]],
+    pid_code: int,
+    block_num: int
+) -> None:
+    """Append one block's trajectories from _block_trajectories() to the buffers."""
+    for target, x, z in trajectories:
+        for buffer in (block_data[block_num][target], all_data[target]):
+            buffer['X'].append(x)
+            buffer['Z'].append(z)
+            buffer['pid'].append(np.full(len(x), pid_code, dtype=np.int32))
+            buffer['block'].append(np.full(len(x), block_num, dtype=np.int8))
+
+
+def _buffer_to_frame(
+    buffer: Dict[str, List[np.ndarray]],
+    target: str,
+    participant_ids: list
+) -> pd.DataFrame:
+    """
+    Concatenate collected column buffers into a trajectory DataFrame.
+
+    Args:
+        buffer: Column buffers from _new_buffer(); 'pid' holds indices into
+            participant_ids
+        target: Target name for every row
+        participant_ids: List of participant IDs
+
+    Returns:
+        DataFrame with Participant, Block_num, X, Z and Target_Name columns
+    """
+    x = np.concatenate(buffer['X'])
+    # The concatenated arrays are fresh, so the frame can take them without a
+    # copy; the constant target name is a one-category Categorical rather
+    # than an object array holding the same string n times
+    return pd.DataFrame({
+        'Participant': pd.Categorical.from_codes(np.concatenate(buffer['pid']), categories=participant_ids),
+        'Block_num': np.concatenate(buffer['block']),
+        'X': x,
+        'Z': np.concatenate(buffer['Z']),
+        'Target_Name': pd.Categorical.from_codes(np.zeros(len(x), dtype=np.int8), categories=[target])
+    }, copy=False)
+
+
+def _write_csv(df: pd.DataFrame, output_path: str) -> None:
+    """Write df to output_path as CSV through a large write buffer."""
+    # newline='' leaves line endings to the writer; os.linesep keeps the
+    # bytes identical to a plain to_csv(output_path)
+    with open(output_path, 'w', buffering=CSV_BUFFER_SIZE, newline='') as f:
+        df.to_csv(f, index=False, lineterminator=os.linesep)
 
 
 def extract_target_trajectories(
@@ -127,63 +428,197 @@ def extract_target_trajectories(
     target_data_dir = f"{output_dir}/Target_Data"
     os.makedirs(target_data_dir, exist_ok=True)
 
-    # Initialize containers for each target/block combination
-    block_data = {block: {target: [] for target in TARGET_ORDER} for block in range(1, 4)}
-    all_data = {target: [] for target in TARGET_ORDER}
+    block_data, all_data = _new_target_buffers()
 
-    for pid in participant_ids:
+    for pid_code, pid in enumerate(participant_ids):
         for block_num in range(1, 4):
             try:
                 filepath = f"{data_folder}/{pid}/Saved_data_{pid}_t{block_num}.csv"
                 data = process_raw_data(filepath)
+                _add_trajectories(block_data, all_data, _block_trajectories(data), pid_code, block_num)
 
-                for target in TARGET_ORDER:
-                    target_df = data[data['Target_Name'] == target].copy()
-                    if target_df.empty:
-                        continue
-
-                    # Keep only unique positions (last occurrence)
-                    target_df = target_df.drop_duplicates(
-                        subset=['X', 'Z', 'Target_Name'],
-                        keep='last'
-                    )
-
-                    # Select relevant columns
-                    result_df = target_df[['X', 'Z', 'Target_Name']].copy()
-                    result_df.insert(0, 'Participant', pid)
-                    result_df.insert(1, 'Block_num', block_num)
+            except FileNotFoundError:
+                logger.warning(f"Warning: Data not found for {pid} block {block_num}")
 
-                    block_data[block_num][target].append(result_df)
-                    all_data[target].append(result_df)
+    _save_target_files(block_data, all_data, target_data_dir, participant_ids)
 
-            except FileNotFoundError:
-                print(f"Warning: Data not found for {pid} block {block_num}")
 
+def _save_target_files(
+    block_data: Dict[int, Dict[str, dict]],
+    all_data: Dict[str, dict],
+    target_data_dir: str,
+    participant_ids: list
+) -> None:
+    """Write the per-block and combined target files from filled buffers."""
     # Save block-specific target files
     for block_num in range(1, 4):
         for target in TARGET_ORDER:
-            if block_data[block_num][target]:
-                combined = pd.concat(block_data[block_num][target], ignore_index=True)
+            if block_data[block_num][target]['X']:
+                combined = _buffer_to_frame(block_data[block_num][target], target, participant_ids)
                 output_path = f"{target_data_dir}/b{block_num}_{target}_results.csv"
-                combined.to_csv(output_path, index=False)
-                print(f"Created: {output_path}")
+                _write_csv(combined, output_path)
+                logger.info(f"Created: {output_path}")
 
     # Save combined target files
     for target in TARGET_ORDER:
-        if all_data[target]:
-            combined = pd.concat(all_data[target], ignore_index=True)
+        if all_data[target]['X']:
+            combined = _buffer_to_frame(all_data[target], target, participant_ids)
             output_path = f"{target_data_dir}/all_{target}_results.csv"
-            combined.to_csv(output_path, index=False)
-            print(f"Created: {output_path}")
+            _write_csv(combined, output_path)
+            logger.info(f"Created: {output_path}")
+
 
+def _read_target_file(filepath: str) -> pd.DataFrame:
+    """
+    Read the columns of a Target_Data trajectory file needed for plotting.
+
+    Files above TARGET_FILE_STREAM_BYTES are parsed in chunks and reduced to
+    compact numeric columns as they are read, so peak memory stays close to
+    the size of the returned frame.
 
-def plot_target_maps(data_folder: str, blocks: list = None) -> None:
+    Returns:
+        DataFrame with Participant (categorical, sorted categories),
+        Block_num (int8), X and Z (float32) columns
+    """
+    if os.path.getsize(filepath) <= TARGET_FILE_STREAM_BYTES:
+        return pd.read_csv(
+            filepath,
+            usecols=list(TARGET_FILE_DTYPES),
+            dtype=TARGET_FILE_DTYPES,
+            engine='pyarrow' if HAS_PARQUET else 'c'
+        )
+
+    # The pyarrow engine does not support chunksize, so stream with the C
+    # parser; participant names are mapped to integer ids across chunks
+    reader = pd.read_csv(
+        filepath,
+        usecols=list(TARGET_FILE_DTYPES),
+        dtype={**TARGET_FILE_DTYPES, 'Participant': str},
+        chunksize=TARGET_FILE_CHUNK_ROWS,
+        engine='c'
+    )
+
+    name_ids: Dict[str, int] = {}
+    columns = {'Participant': [], 'Block_num': [], 'X': [], 'Z': []}
+    for chunk in reader:
+        codes, names = pd.factorize(chunk['Participant'])
+        ids = np.array([name_ids.setdefault(name, len(name_ids)) for name in names], dtype=np.int32)
+        columns['Participant'].append(ids[codes])
+        for col in ('Block_num', 'X', 'Z'):
+            columns[col].append(chunk[col].to_numpy())
+
+    if not columns['X']:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in TARGET_FILE_DTYPES.items()})
+
+    # Recode ids so categories are sorted, as when reading in one go
+    categories = sorted(name_ids)
+    rank = {name: i for i, name in enumerate(categories)}
+    recode = np.array([rank[name] for name in name_ids], dtype=np.int32)
+
+    return pd.DataFrame({
+        'Participant': pd.Categorical.from_codes(recode[np.concatenate(columns['Participant'])], categories=categories),
+        'Block_num': np.concatenate(columns['Block_num']),
+        'X': np.concatenate(columns['X']),
+        'Z': np.concatenate(columns['Z'])
+    }, copy=False)
+
+
+def _draw_target_map(df: pd.DataFrame, title: str, output_path: str) -> None:
+    """Draw and save the overhead map of every trajectory in df."""
+    # Split the rows into one trajectory per participant/block, ordered as
+    # groupby(['Participant', 'Block_num']) would order them
+    pid_codes = df['Participant'].cat.codes.to_numpy(dtype=np.int64)
+    block_codes, block_values = pd.factorize(df['Block_num'], sort=True)
+    keys = pid_codes * len(block_values) + block_codes
+    order = np.argsort(keys, kind='stable')
+    xz = np.column_stack((df['X'].to_numpy(), df['Z'].to_numpy()))[order]
+    segments = np.split(xz, np.flatnonzero(np.diff(keys[order])) + 1)
+
+    # Draw all trajectories as one collection, cycling colors like ax.plot
+    cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [cycle[i % len(cycle)] for i in range(len(segments))]
+
+    fig, ax = _get_axes()
+    ax.add_collection(LineCollection(
+        segments, colors=colors, alpha=0.5, linewidths=0.8,
+        capstyle='projecting', joinstyle='round'
+    ))
+
+    ax.set_xlim(X_LIMITS)
+    ax.set_ylim(Z_LIMITS)
+    ax.set_xlabel('X Position')
+    ax.set_ylabel('Z Position')
+    ax.set_title(title)
+
+    fig.savefig(output_path, **SAVE_KWARGS)
+
+
+def _render_target_maps(
+    target: str,
+    blocks: List[str],
+    target_data_dir: str,
+    maps_dir: str,
+    use_all_file: bool,
+    force: bool = False
+) -> List[Status]:
+    """
+    Render the overhead maps of one target for the given blocks.
+
+    The {block}_{target}_results.csv file of every block must exist. With
+    use_all_file, all_{target}_results.csv is read once and the per-block
+    rows are taken from it (they are the same rows in the same order);
+    otherwise each block's own file is read.
+
+    Returns:
+        Statuses for the main process to log
+    """
+    statuses = []
+    all_df = None
+
+    for block in blocks:
+        filepath = f"{target_data_dir}/{block}_{target}_results.csv"
+
+        # Skip maps that are newer than their target file
+        output_path = f"{maps_dir}/{block}/{block}_{target}.png"
+        if not force and _is_up_to_date(output_path, filepath):
+            statuses.append((logging.INFO, f"Up to date: {output_path}"))
+            continue
+
+        if use_all_file:
+            if all_df is None:
+                all_df = _read_target_file(f"{target_data_dir}/all_{target}_results.csv")
+            df = all_df if block == 'all' else all_df[all_df['Block_num'] == int(block[1:])]
+        else:
+            df = _read_target_file(filepath)
+
+        if df.empty:
+            continue
+
+        _draw_target_map(df, f"{target} - {block}", output_path)
+        statuses.append((logging.INFO, f"Created: {output_path}"))
+
+    return statuses
+
+
+def plot_target_maps(
+    data_folder: str,
+    blocks: list = None,
+    max_workers: Optional[int] = None,
+    force: bool = False
+) -> None:
     """
     Generate overhead maps showing all participant trajectories for each target.
 
+    Each target's combined file is read once and filtered by block, rather
+    than reading every per-block file. Maps already newer than their target
+    file are not re-rendered.
+
     Args:
         data_folder: Base data folder path
         blocks: List of blocks to plot (e.g., ['all', 'b1', 'b2', 'b3'])
+        max_workers: Number of worker processes (defaults to CPU count);
+            with 1, maps are rendered sequentially in the current process
+        force: Re-render every map even if it is up to date
     """
     if blocks is None:
         blocks = ['all', 'b1', 'b2', 'b3']
@@ -191,36 +626,108 @@ def plot_target_maps(data_folder: str, blocks: list = None) -> None:
     target_data_dir = f"{data_folder}/Target_Data"
     maps_dir = f"{target_data_dir}/maps"
 
+    # List the target files once instead of checking each path
+    existing = set(os.listdir(target_data_dir)) if os.path.isdir(target_data_dir) else set()
+
+    target_blocks = {target: [] for target in TARGET_ORDER}
     for block in blocks:
-        block_maps_dir = f"{maps_dir}/{block}"
-        os.makedirs(block_maps_dir, exist_ok=True)
+        os.makedirs(f"{maps_dir}/{block}", exist_ok=True)
 
         for target in TARGET_ORDER:
-            filepath = f"{target_data_dir}/{block}_{target}_results.csv"
-
-            if not os.path.exists(filepath):
-                print(f"Warning: {filepath} not found")
+            filename = f"{block}_{target}_results.csv"
+            if filename not in existing:
+                logger.warning(f"Warning: {target_data_dir}/{filename} not found")
                 continue
+            target_blocks[target].append(block)
+
+    tasks = [
+        (target, target_blocks[target], target_data_dir, maps_dir,
+         f"all_{target}_results.csv" in existing, force)
+        for target in TARGET_ORDER
+        if target_blocks[target]
+    ]
+
+    for statuses in _run_tasks(_render_target_maps, tasks, max_workers):
+        for level, message in statuses:
+            logger.log(level, message)
+
+
+def _process_block(
+    pid: str,
+    block_num: int,
+    input_dir: Path,
+    participant_output_dir: Path,
+    force: bool = False
+) -> Tuple[str, int, Status, Optional[List[Tuple[str, np.ndarray, np.ndarray]]]]:
+    """
+    Render the movement plot and extract target trajectories for one block.
 
-            df = pd.read_csv(filepath)
+    Returns:
+        Tuple of (pid, block_num, status, trajectories), where
+        trajectories is None if the raw data file is missing
+    """
+    filepath = input_dir / f"Saved_data_{pid}_t{block_num}.csv"
+    output_path = participant_output_dir / f"b{block_num}_movement.png"
 
-            if df.empty:
-                continue
+    try:
+        data = process_raw_data(filepath)
+    except FileNotFoundError:
+        return pid, block_num, (logging.WARNING, f"Warning: Data not found for {pid} block {block_num}"), None
+
+    # Skip plots that are newer than their raw data
+    if not force and _is_up_to_date(output_path, filepath):
+        status = logging.INFO, f"Up to date: {output_path}"
+    else:
+        _draw_movement(data, output_path, f"{pid} - Block {block_num}")
+        status = logging.INFO, f"Created: {output_path}"
+
+    return pid, block_num, status, _block_trajectories(data)
+
+
+def run_all(
+    data_folder: str,
+    participant_ids: list,
+    output_dir: str = None,
+    max_workers: Optional[int] = None,
+    force: bool = False
+) -> None:
+    """
+    Extract target trajectories and generate all plots, reading each raw file once.
+
+    Equivalent to extract_target_trajectories(), generate_participant_movement_plots()
+    and plot_target_maps() run in turn, but each raw CSV file is parsed once
+    for both its movement plot and its trajectories.
+
+    Args:
+        data_folder: Base data folder path (input data location)
+        participant_ids: List of participant IDs
+        output_dir: Output directory for results and plots (defaults to data_folder)
+        max_workers: Number of worker processes (defaults to CPU count);
+            with 1, blocks are processed sequentially in the current process
+        force: Re-render every plot even if it is up to date
+    """
+    if output_dir is None:
+        output_dir = data_folder
 
-            fig, ax = plt.subplots(figsize=(10, 8))
+    target_data_dir = f"{output_dir}/Target_Data"
+    os.makedirs(target_data_dir, exist_ok=True)
 
-            # Plot each participant's trajectory
-            for (pid, block_num), group in df.groupby(['Participant', 'Block_num']):
-                ax.plot(group['X'], group['Z'], alpha=0.5, linewidth=0.8)
+    tasks = _movement_tasks(data_folder, participant_ids, output_dir, force)
 
-            ax.set_xlim(X_LIMITS)
-            ax.set_ylim(Z_LIMITS)
-            ax.set_xlabel('X Position')
-            ax.set_ylabel('Z Position')
-            ax.set_title(f"{target} - {block}")
+    # Blocks may complete in any order; collect trajectories and add them to
+    # the buffers in participant/block order afterwards
+    block_trajectories = {}
+    for pid, block_num, (level, message), trajectories in _run_tasks(_process_block, tasks, max_workers):
+        logger.log(level, message)
+        if trajectories is not None:
+            block_trajectories[(pid, block_num)] = trajectories
+
+    block_data, all_data = _new_target_buffers()
+    for pid_code, pid in enumerate(participant_ids):
+        for block_num in range(1, 4):
+            if (pid, block_num) in block_trajectories:
+                _add_trajectories(block_data, all_data, block_trajectories[(pid, block_num)], pid_code, block_num)
 
-            output_path = f"{block_maps_dir}/{block}_{target}.png"
-            plt.savefig(output_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
+    _save_target_files(block_data, all_data, target_data_dir, participant_ids)
 
-            print(f"Created: {output_path}")
+    plot_target_maps(output_dir, max_workers=max_workers, force=force)